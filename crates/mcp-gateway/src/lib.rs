@@ -7,6 +7,7 @@ pub mod metrics;
 pub mod server;
 pub mod service;
 pub mod proto;
+pub mod rest;
 pub mod tracing;
 
 pub use crate::proto::mcp;
@@ -1,7 +1,8 @@
-use mcp_gateway::{create_server, new_service};
+use mcp_gateway::new_service;
 use mcp_gateway::server::run_server;
 use mcp_gateway::tracing::{init_tracing, shutdown_tracing, TracingConfig};
 use std::net::SocketAddr;
+use std::sync::Arc;
 use std::time::SystemTime;
 use tracing::info;
 
@@ -41,20 +42,29 @@ async fn main() -> Result<(), Box<dyn std::error::Error>> {
     // サービスの起動時間を記録
     let start_time = SystemTime::now();
     
-    // サービス実装を作成
-    let service = new_service(start_time);
+    // サービス実装を作成 (gRPCとRESTで共有する)
+    let service = Arc::new(new_service(start_time));
     
     // バインドするアドレス
     let addr = std::env::var("MCP_BIND_ADDRESS")
         .unwrap_or_else(|_| "127.0.0.1:8081".to_string())
         .parse::<SocketAddr>()?;
-    
-    // gRPCサービスを作成
-    let grpc_service = create_server(service);
+
+    // REST APIサーバーがバインドするアドレス
+    // 認証なしでコマンドの実行とタスクの出力を受け付けるため、設定された場合にのみ起動する
+    let http_addr = std::env::var("MCP_HTTP_BIND_ADDRESS")
+        .ok()
+        .map(|addr| addr.parse::<SocketAddr>())
+        .transpose()?;
+
+    // メトリクスサーバーがバインドするアドレス
+    let metrics_addr = std::env::var("MCP_METRICS_BIND_ADDRESS")
+        .unwrap_or_else(|_| "0.0.0.0:9090".to_string())
+        .parse::<SocketAddr>()?;
     
     // サーバーを起動
     info!("サーバーを開始します: {}", addr);
-    run_server(addr, grpc_service).await?;
+    run_server(addr, http_addr, metrics_addr, service).await?;
     
     // トレーシングをシャットダウン
     shutdown_tracing();
@@ -103,6 +103,20 @@ pub struct TaskCreatedResponse {
     #[prost(string, tag = "3")]
     pub created_at: ::prost::alloc::string::String,
 }
+/// 一括実行レスポンス（リクエストごとに1件、リクエストの順序で返す）
+#[allow(clippy::derive_partial_eq_without_eq)]
+#[derive(Clone, PartialEq, ::prost::Message)]
+pub struct BatchCommandResponse {
+    /// 作成されたタスク（コマンドが拒否された場合は未設定）
+    #[prost(message, optional, tag = "1")]
+    pub task: ::core::option::Option<TaskCreatedResponse>,
+    /// コマンドが拒否された場合のエラーメッセージ（ポリシー違反など）
+    #[prost(string, optional, tag = "2")]
+    pub error: ::core::option::Option<::prost::alloc::string::String>,
+    /// エラーのgRPCステータスコード（受け付けた場合は0）
+    #[prost(int32, tag = "3")]
+    pub code: i32,
+}
 /// タスク状態リクエスト
 #[allow(clippy::derive_partial_eq_without_eq)]
 #[derive(Clone, PartialEq, ::prost::Message)]
@@ -555,6 +569,32 @@ pub mod mcp_service_client {
                 .insert(GrpcMethod::new("mcp.McpService", "ExecuteCommand"));
             self.inner.unary(req, path, codec).await
         }
+        /// コマンドの一括実行
+        pub async fn execute_batch(
+            &mut self,
+            request: impl tonic::IntoStreamingRequest<Message = super::CommandRequest>,
+        ) -> std::result::Result<
+            tonic::Response<tonic::codec::Streaming<super::BatchCommandResponse>>,
+            tonic::Status,
+        > {
+            self.inner
+                .ready()
+                .await
+                .map_err(|e| {
+                    tonic::Status::new(
+                        tonic::Code::Unknown,
+                        format!("Service was not ready: {}", e.into()),
+                    )
+                })?;
+            let codec = tonic::codec::ProstCodec::default();
+            let path = http::uri::PathAndQuery::from_static(
+                "/mcp.McpService/ExecuteBatch",
+            );
+            let mut req = request.into_streaming_request();
+            req.extensions_mut()
+                .insert(GrpcMethod::new("mcp.McpService", "ExecuteBatch"));
+            self.inner.streaming(req, path, codec).await
+        }
         /// タスク状態取得
         pub async fn get_task_status(
             &mut self,
@@ -607,6 +647,32 @@ pub mod mcp_service_client {
                 .insert(GrpcMethod::new("mcp.McpService", "StreamTaskOutput"));
             self.inner.server_streaming(req, path, codec).await
         }
+        /// タスク状態の監視
+        pub async fn watch_task(
+            &mut self,
+            request: impl tonic::IntoRequest<super::TaskStatusRequest>,
+        ) -> std::result::Result<
+            tonic::Response<tonic::codec::Streaming<super::TaskStatusResponse>>,
+            tonic::Status,
+        > {
+            self.inner
+                .ready()
+                .await
+                .map_err(|e| {
+                    tonic::Status::new(
+                        tonic::Code::Unknown,
+                        format!("Service was not ready: {}", e.into()),
+                    )
+                })?;
+            let codec = tonic::codec::ProstCodec::default();
+            let path = http::uri::PathAndQuery::from_static(
+                "/mcp.McpService/WatchTask",
+            );
+            let mut req = request.into_request();
+            req.extensions_mut()
+                .insert(GrpcMethod::new("mcp.McpService", "WatchTask"));
+            self.inner.server_streaming(req, path, codec).await
+        }
         /// タスクキャンセル
         pub async fn cancel_task(
             &mut self,
@@ -723,6 +789,20 @@ pub mod mcp_service_server {
             tonic::Response<super::TaskCreatedResponse>,
             tonic::Status,
         >;
+        /// Server streaming response type for the ExecuteBatch method.
+        type ExecuteBatchStream: tonic::codegen::tokio_stream::Stream<
+                Item = std::result::Result<super::BatchCommandResponse, tonic::Status>,
+            >
+            + Send
+            + 'static;
+        /// コマンドの一括実行
+        async fn execute_batch(
+            &self,
+            request: tonic::Request<tonic::Streaming<super::CommandRequest>>,
+        ) -> std::result::Result<
+            tonic::Response<Self::ExecuteBatchStream>,
+            tonic::Status,
+        >;
         /// タスク状態取得
         async fn get_task_status(
             &self,
@@ -745,6 +825,20 @@ pub mod mcp_service_server {
             tonic::Response<Self::StreamTaskOutputStream>,
             tonic::Status,
         >;
+        /// Server streaming response type for the WatchTask method.
+        type WatchTaskStream: tonic::codegen::tokio_stream::Stream<
+                Item = std::result::Result<super::TaskStatusResponse, tonic::Status>,
+            >
+            + Send
+            + 'static;
+        /// タスク状態の監視
+        async fn watch_task(
+            &self,
+            request: tonic::Request<super::TaskStatusRequest>,
+        ) -> std::result::Result<
+            tonic::Response<Self::WatchTaskStream>,
+            tonic::Status,
+        >;
         /// タスクキャンセル
         async fn cancel_task(
             &self,
@@ -946,6 +1040,55 @@ pub mod mcp_service_server {
                     };
                     Box::pin(fut)
                 }
+                "/mcp.McpService/ExecuteBatch" => {
+                    #[allow(non_camel_case_types)]
+                    struct ExecuteBatchSvc<T: McpService>(pub Arc<T>);
+                    impl<
+                        T: McpService,
+                    > tonic::server::StreamingService<super::CommandRequest>
+                    for ExecuteBatchSvc<T> {
+                        type Response = super::BatchCommandResponse;
+                        type ResponseStream = T::ExecuteBatchStream;
+                        type Future = BoxFuture<
+                            tonic::Response<Self::ResponseStream>,
+                            tonic::Status,
+                        >;
+                        fn call(
+                            &mut self,
+                            request: tonic::Request<
+                                tonic::Streaming<super::CommandRequest>,
+                            >,
+                        ) -> Self::Future {
+                            let inner = Arc::clone(&self.0);
+                            let fut = async move {
+                                <T as McpService>::execute_batch(&inner, request).await
+                            };
+                            Box::pin(fut)
+                        }
+                    }
+                    let accept_compression_encodings = self.accept_compression_encodings;
+                    let send_compression_encodings = self.send_compression_encodings;
+                    let max_decoding_message_size = self.max_decoding_message_size;
+                    let max_encoding_message_size = self.max_encoding_message_size;
+                    let inner = self.inner.clone();
+                    let fut = async move {
+                        let inner = inner.0;
+                        let method = ExecuteBatchSvc(inner);
+                        let codec = tonic::codec::ProstCodec::default();
+                        let mut grpc = tonic::server::Grpc::new(codec)
+                            .apply_compression_config(
+                                accept_compression_encodings,
+                                send_compression_encodings,
+                            )
+                            .apply_max_message_size_config(
+                                max_decoding_message_size,
+                                max_encoding_message_size,
+                            );
+                        let res = grpc.streaming(method, req).await;
+                        Ok(res)
+                    };
+                    Box::pin(fut)
+                }
                 "/mcp.McpService/GetTaskStatus" => {
                     #[allow(non_camel_case_types)]
                     struct GetTaskStatusSvc<T: McpService>(pub Arc<T>);
@@ -1039,6 +1182,53 @@ pub mod mcp_service_server {
                     };
                     Box::pin(fut)
                 }
+                "/mcp.McpService/WatchTask" => {
+                    #[allow(non_camel_case_types)]
+                    struct WatchTaskSvc<T: McpService>(pub Arc<T>);
+                    impl<
+                        T: McpService,
+                    > tonic::server::ServerStreamingService<super::TaskStatusRequest>
+                    for WatchTaskSvc<T> {
+                        type Response = super::TaskStatusResponse;
+                        type ResponseStream = T::WatchTaskStream;
+                        type Future = BoxFuture<
+                            tonic::Response<Self::ResponseStream>,
+                            tonic::Status,
+                        >;
+                        fn call(
+                            &mut self,
+                            request: tonic::Request<super::TaskStatusRequest>,
+                        ) -> Self::Future {
+                            let inner = Arc::clone(&self.0);
+                            let fut = async move {
+                                <T as McpService>::watch_task(&inner, request).await
+                            };
+                            Box::pin(fut)
+                        }
+                    }
+                    let accept_compression_encodings = self.accept_compression_encodings;
+                    let send_compression_encodings = self.send_compression_encodings;
+                    let max_decoding_message_size = self.max_decoding_message_size;
+                    let max_encoding_message_size = self.max_encoding_message_size;
+                    let inner = self.inner.clone();
+                    let fut = async move {
+                        let inner = inner.0;
+                        let method = WatchTaskSvc(inner);
+                        let codec = tonic::codec::ProstCodec::default();
+                        let mut grpc = tonic::server::Grpc::new(codec)
+                            .apply_compression_config(
+                                accept_compression_encodings,
+                                send_compression_encodings,
+                            )
+                            .apply_max_message_size_config(
+                                max_decoding_message_size,
+                                max_encoding_message_size,
+                            );
+                        let res = grpc.server_streaming(method, req).await;
+                        Ok(res)
+                    };
+                    Box::pin(fut)
+                }
                 "/mcp.McpService/CancelTask" => {
                     #[allow(non_camel_case_types)]
                     struct CancelTaskSvc<T: McpService>(pub Arc<T>);
@@ -0,0 +1,368 @@
+//! REST APIの実装
+//!
+//! gRPCと同じサービス実装をHTTP+JSONで公開する。
+//! 認証なしでコマンドの実行とタスクの出力を受け付けるため、
+//! `MCP_HTTP_BIND_ADDRESS`が設定された場合にのみ起動する。
+
+use crate::proto::{
+    CommandRequest, HealthRequest, McpService, TaskStatus, TaskStatusRequest, TaskStatusResponse,
+};
+use crate::{ErrorHandler, McpServiceImpl};
+use axum::extract::{Path, State};
+use axum::http::StatusCode;
+use axum::response::sse::{Event, Sse};
+use axum::routing::{get, post};
+use axum::{Json, Router};
+use serde::Deserialize;
+use serde_json::{json, Value};
+use std::collections::HashMap;
+use std::convert::Infallible;
+use std::net::SocketAddr;
+use std::sync::Arc;
+use tokio_stream::wrappers::ReceiverStream;
+use tonic::{Code, Request, Status};
+use tracing::info;
+
+/// エラー応答（HTTPステータスとJSONボディ）
+type ApiError = (StatusCode, Json<Value>);
+
+/// コマンド実行リクエストのボディ
+#[derive(Debug, Deserialize)]
+pub struct ExecuteRequest {
+    /// 実行するコマンド
+    pub command: String,
+    /// コマンド引数
+    #[serde(default)]
+    pub args: Vec<String>,
+    /// 環境変数
+    #[serde(default)]
+    pub env: HashMap<String, String>,
+    /// 作業ディレクトリ
+    #[serde(default)]
+    pub cwd: Option<String>,
+    /// タイムアウト（秒）。0の場合はデフォルト値を使用する
+    #[serde(default)]
+    pub timeout: u32,
+    /// メタデータ
+    #[serde(default)]
+    pub metadata: HashMap<String, String>,
+}
+
+/// REST APIのルーターを作成する
+pub fn create_router(service: Arc<McpServiceImpl>) -> Router {
+    Router::new()
+        .route("/health", get(health_handler))
+        .route("/v1/execute", post(execute_handler))
+        .route("/v1/tasks/:task_id", get(task_status_handler))
+        .route("/v1/tasks/:task_id/watch", get(watch_task_handler))
+        .with_state(service)
+}
+
+/// REST APIサーバーを起動する
+///
+/// バインドまでを呼び出し元で待ち、失敗した場合はエラーを返す。
+/// バインド後の接続処理はバックグラウンドのタスクで行う。
+pub async fn start_rest_server(
+    addr: SocketAddr,
+    service: Arc<McpServiceImpl>,
+) -> std::io::Result<()> {
+    let app = create_router(service);
+    let listener = tokio::net::TcpListener::bind(addr).await?;
+    info!("RESTサーバーを起動します: {}", addr);
+
+    tokio::spawn(async move {
+        if let Err(e) = axum::serve(listener, app).await {
+            tracing::error!("RESTサーバーの起動に失敗しました: {}", e);
+        }
+    });
+
+    Ok(())
+}
+
+/// ヘルスチェックエンドポイントのハンドラー
+async fn health_handler(
+    State(service): State<Arc<McpServiceImpl>>,
+) -> Result<Json<Value>, ApiError> {
+    let health = service
+        .health(Request::new(HealthRequest {}))
+        .await
+        .map_err(error_response)?
+        .into_inner();
+
+    Ok(Json(json!({
+        "status": health.status,
+        "version": health.version,
+        "uptime_seconds": health.uptime_seconds,
+    })))
+}
+
+/// コマンド実行エンドポイントのハンドラー
+async fn execute_handler(
+    State(service): State<Arc<McpServiceImpl>>,
+    Json(body): Json<ExecuteRequest>,
+) -> Result<Json<Value>, ApiError> {
+    let request = CommandRequest {
+        command: body.command,
+        args: body.args,
+        env: body.env,
+        cwd: body.cwd,
+        timeout: body.timeout,
+        metadata: body.metadata,
+        sandbox_config: None,
+    };
+
+    let created = service
+        .execute_command(Request::new(request))
+        .await
+        .map_err(error_response)?
+        .into_inner();
+
+    Ok(Json(json!({
+        "task_id": created.task_id,
+        "status": status_name(created.status()),
+        "created_at": created.created_at,
+    })))
+}
+
+/// タスク状態取得エンドポイントのハンドラー
+async fn task_status_handler(
+    State(service): State<Arc<McpServiceImpl>>,
+    Path(task_id): Path<String>,
+) -> Result<Json<Value>, ApiError> {
+    let response = service
+        .get_task_status(Request::new(TaskStatusRequest { task_id }))
+        .await
+        .map_err(error_response)?
+        .into_inner();
+
+    Ok(Json(task_status_json(&response)))
+}
+
+/// タスク状態監視エンドポイントのハンドラー
+///
+/// タスクの状態遷移をServer-Sent Eventsとして送信し、終了状態でストリームを閉じる。
+async fn watch_task_handler(
+    State(service): State<Arc<McpServiceImpl>>,
+    Path(task_id): Path<String>,
+) -> Result<Sse<ReceiverStream<Result<Event, Infallible>>>, ApiError> {
+    let result =
+        service.subscribe_task_updates(&task_id, |response| Ok(task_status_event(&response)));
+    let updates = ErrorHandler::handle(result)
+        .map_err(error_response)?
+        .into_inner();
+
+    Ok(Sse::new(ReceiverStream::new(updates)))
+}
+
+/// タスク状態をSSEイベントに変換する
+fn task_status_event(response: &TaskStatusResponse) -> Event {
+    Event::default().data(task_status_json(response).to_string())
+}
+
+/// タスク状態をJSONに変換する
+///
+/// 結果がまだ存在しない場合、`exit_code`・`stdout`・`stderr`は`null`になる
+fn task_status_json(response: &TaskStatusResponse) -> Value {
+    let (task_id, status) = match &response.task_info {
+        Some(info) => (info.task_id.as_str(), status_name(info.status())),
+        None => ("", ""),
+    };
+    let result = response.result.as_ref();
+
+    json!({
+        "task_id": task_id,
+        "status": status,
+        "exit_code": result.map(|r| r.exit_code),
+        "stdout": result.map(|r| r.stdout.as_str()),
+        "stderr": result.map(|r| r.stderr.as_str()),
+    })
+}
+
+/// タスク状態の名前を返す
+///
+/// protoのenum名から`TASK_`接頭辞を除いたもの（例: `COMPLETED`）
+fn status_name(status: TaskStatus) -> &'static str {
+    status.as_str_name().trim_start_matches("TASK_")
+}
+
+/// gRPCステータスをHTTPのエラー応答に変換する
+fn error_response(status: Status) -> ApiError {
+    let code = match status.code() {
+        Code::InvalidArgument | Code::OutOfRange => StatusCode::BAD_REQUEST,
+        Code::Unauthenticated => StatusCode::UNAUTHORIZED,
+        Code::PermissionDenied => StatusCode::FORBIDDEN,
+        Code::NotFound => StatusCode::NOT_FOUND,
+        Code::AlreadyExists | Code::Aborted => StatusCode::CONFLICT,
+        Code::FailedPrecondition => StatusCode::PRECONDITION_FAILED,
+        Code::ResourceExhausted => StatusCode::TOO_MANY_REQUESTS,
+        Code::Unavailable => StatusCode::SERVICE_UNAVAILABLE,
+        Code::DeadlineExceeded => StatusCode::GATEWAY_TIMEOUT,
+        Code::Unimplemented => StatusCode::NOT_IMPLEMENTED,
+        _ => StatusCode::INTERNAL_SERVER_ERROR,
+    };
+
+    (code, Json(json!({ "error": status.message() })))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::proto::{TaskInfo, TaskResult};
+    use axum::body::Body;
+    use axum::http::Request as HttpRequest;
+    use axum::response::IntoResponse;
+    use std::time::{Duration, SystemTime};
+    use tower::ServiceExt;
+
+    fn completed_response() -> TaskStatusResponse {
+        TaskStatusResponse {
+            task_info: Some(TaskInfo {
+                task_id: "task-1".to_string(),
+                status: TaskStatus::TaskCompleted as i32,
+                ..Default::default()
+            }),
+            result: Some(TaskResult {
+                exit_code: 0,
+                stdout: "hello\n".to_string(),
+                ..Default::default()
+            }),
+        }
+    }
+
+    // テスト用のヘルパー関数：新しいサービスインスタンスでルーターを作成
+    fn router() -> Router {
+        create_router(Arc::new(crate::new_service(SystemTime::now())))
+    }
+
+    // テスト用のヘルパー関数：ルーターにリクエストを1件送り、ステータスとボディを返す
+    async fn send(app: Router, request: HttpRequest<Body>) -> (StatusCode, String) {
+        let response = app.oneshot(request).await.unwrap();
+        let status = response.status();
+        let body = axum::body::to_bytes(response.into_body(), usize::MAX)
+            .await
+            .unwrap();
+        (status, String::from_utf8(body.to_vec()).unwrap())
+    }
+
+    // テスト用のヘルパー関数：コマンド実行リクエストを作成
+    fn execute_request(command: &str) -> HttpRequest<Body> {
+        HttpRequest::post("/v1/execute")
+            .header("content-type", "application/json")
+            .body(Body::from(json!({ "command": command }).to_string()))
+            .unwrap()
+    }
+
+    // コマンド実行エンドポイントのテスト：許可されたコマンドはタスクIDを返すこと
+    #[tokio::test]
+    async fn test_execute_route() {
+        let (status, body) = send(router(), execute_request("echo")).await;
+        assert_eq!(status, StatusCode::OK);
+
+        let value: Value = serde_json::from_str(&body).unwrap();
+        assert!(!value["task_id"].as_str().unwrap().is_empty());
+    }
+
+    // コマンド実行エンドポイントのテスト：ポリシーで拒否されたコマンドは403を返すこと
+    #[tokio::test]
+    async fn test_execute_route_denied() {
+        let (status, body) = send(router(), execute_request("whoami")).await;
+        assert_eq!(status, StatusCode::FORBIDDEN);
+
+        let value: Value = serde_json::from_str(&body).unwrap();
+        assert!(value["error"].is_string());
+    }
+
+    // タスク状態取得エンドポイントのテスト：存在しないタスクは404を返すこと
+    #[tokio::test]
+    async fn test_task_status_route_not_found() {
+        let request = HttpRequest::get("/v1/tasks/unknown-task")
+            .body(Body::empty())
+            .unwrap();
+        let (status, _) = send(router(), request).await;
+        assert_eq!(status, StatusCode::NOT_FOUND);
+    }
+
+    // タスク状態監視エンドポイントのテスト：最後のイベントが完了状態であること
+    #[cfg(not(target_os = "windows"))]
+    #[tokio::test]
+    async fn test_watch_task_route() {
+        let app = router();
+
+        let (status, body) = send(app.clone(), execute_request("echo")).await;
+        assert_eq!(status, StatusCode::OK);
+        let value: Value = serde_json::from_str(&body).unwrap();
+        let task_id = value["task_id"].as_str().unwrap();
+
+        // 終了状態のイベントを送るとストリームが閉じるため、ボディ全体を読み切れる
+        let request = HttpRequest::get(format!("/v1/tasks/{}/watch", task_id))
+            .body(Body::empty())
+            .unwrap();
+        let (status, body) = tokio::time::timeout(Duration::from_secs(10), send(app, request))
+            .await
+            .expect("タスク状態の監視が時間内に終わりませんでした");
+        assert_eq!(status, StatusCode::OK);
+
+        let last = body
+            .split("\n\n")
+            .filter_map(|event| event.strip_prefix("data: "))
+            .last()
+            .expect("SSEイベントがありません");
+        assert!(last.contains(r#""status":"COMPLETED""#));
+    }
+
+    // SSEイベントのテスト：dataフィールドにタスク状態のJSONが1行で入ること
+    #[tokio::test]
+    async fn test_task_status_event() {
+        let event = task_status_event(&completed_response());
+        let sse = Sse::new(tokio_stream::iter(vec![Ok::<_, Infallible>(event)]));
+
+        let body = axum::body::to_bytes(sse.into_response().into_body(), usize::MAX)
+            .await
+            .unwrap();
+        let body = std::str::from_utf8(&body).unwrap();
+
+        let data = body
+            .strip_prefix("data: ")
+            .and_then(|rest| rest.strip_suffix("\n\n"))
+            .expect("SSEイベントの形式が不正です");
+        let value: Value = serde_json::from_str(data).unwrap();
+
+        assert_eq!(value["task_id"], "task-1");
+        assert_eq!(value["status"], "COMPLETED");
+        assert_eq!(value["exit_code"], 0);
+        assert_eq!(value["stdout"], "hello\n");
+    }
+
+    // 結果がまだないタスクのJSON変換テスト
+    #[test]
+    fn test_task_status_json_without_result() {
+        let response = TaskStatusResponse {
+            task_info: Some(TaskInfo {
+                task_id: "task-2".to_string(),
+                status: TaskStatus::TaskRunning as i32,
+                ..Default::default()
+            }),
+            result: None,
+        };
+
+        let value = task_status_json(&response);
+        assert_eq!(value["task_id"], "task-2");
+        assert_eq!(value["status"], "RUNNING");
+        assert!(value["exit_code"].is_null());
+        assert!(value["stdout"].is_null());
+    }
+
+    // gRPCステータスからHTTPステータスへの変換テスト
+    #[test]
+    fn test_error_response() {
+        let (code, Json(body)) = error_response(Status::not_found("タスクが見つかりません"));
+        assert_eq!(code, StatusCode::NOT_FOUND);
+        assert_eq!(body["error"], "タスクが見つかりません");
+
+        let (code, _) = error_response(Status::permission_denied("denied"));
+        assert_eq!(code, StatusCode::FORBIDDEN);
+
+        let (code, _) = error_response(Status::internal("error"));
+        assert_eq!(code, StatusCode::INTERNAL_SERVER_ERROR);
+    }
+}
@@ -1,12 +1,15 @@
 use crate::proto::mcp_service_server::McpServiceServer;
 use crate::McpServiceImpl;
 use std::net::SocketAddr;
+use std::sync::Arc;
+use tonic::transport::server::TcpIncoming;
 use tonic::transport::Server;
 use tracing::info;
 use axum::{Router, routing::get, response::Response, body::Body, http::{header, StatusCode}};
 use prometheus::Encoder;
 use prometheus::TextEncoder;
 use crate::metrics;
+use crate::rest;
 
 /// gRPCサーバーの作成
 ///
@@ -20,9 +23,20 @@ pub fn create_server(service: McpServiceImpl) -> McpServiceServer<McpServiceImpl
 }
 
 /// サーバーを実行する
+///
+/// gRPCサーバーと、REST APIサーバー・メトリクスサーバーで
+/// 同じサービス実装を共有する。REST APIサーバーは`http_addr`が指定された場合にのみ起動する。
+///
+/// # 引数
+/// * `addr` - gRPCサーバーのバインドアドレス
+/// * `http_addr` - REST APIサーバーのバインドアドレス（`None`の場合は起動しない）
+/// * `metrics_addr` - メトリクスサーバーのバインドアドレス
+/// * `service` - サービス実装
 pub async fn run_server(
     addr: SocketAddr,
-    service: McpServiceServer<McpServiceImpl>,
+    http_addr: Option<SocketAddr>,
+    metrics_addr: SocketAddr,
+    service: Arc<McpServiceImpl>,
 ) -> Result<(), Box<dyn std::error::Error>> {
     info!("gRPCサーバーを起動します: {}", addr);
 
@@ -30,25 +44,35 @@ pub async fn run_server(
     metrics::init_metrics();
 
     // メトリクスサーバーを起動
-    start_metrics_server();
+    start_metrics_server(metrics_addr);
+
+    // REST APIサーバーを起動 (バインドに失敗した場合は起動を中止する)
+    if let Some(http_addr) = http_addr {
+        rest::start_rest_server(http_addr, service.clone()).await?;
+    }
+
+    // 先にバインドし、接続を受け付けられる状態になってから通知する
+    // TcpIncoming::newのエラー型はSend + Syncを要求するため、戻り値の型に合わせて変換する
+    let incoming = TcpIncoming::new(addr, true, None)
+        .map_err(|e| -> Box<dyn std::error::Error> { e })?;
+    info!("Server listening on {}", addr);
 
     Server::builder()
-        .add_service(service)
-        .serve(addr)
+        .add_service(McpServiceServer::from_arc(service))
+        .serve_with_incoming(incoming)
         .await?;
 
     Ok(())
 }
 
 /// メトリクスサーバーを起動する
-fn start_metrics_server() {
+fn start_metrics_server(metrics_addr: SocketAddr) {
     // メトリクスサーバーのエンドポイントを定義
     let app = Router::new()
         .route("/metrics", get(metrics_handler))
         .route("/health", get(health_handler));
 
     // メトリクスサーバーを別スレッドで起動
-    let metrics_addr = std::net::SocketAddr::from(([0, 0, 0, 0], 9090));
     info!("メトリクスサーバーを起動します: {}", metrics_addr);
 
     tokio::spawn(async move {
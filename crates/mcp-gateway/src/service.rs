@@ -1,7 +1,8 @@
 use crate::proto::{
-    self, CommandRequest, DeleteFileRequest, DeleteFileResponse, HealthRequest, HealthResponse,
-    McpService, ReadFileRequest, ReadFileResponse, TaskCreatedResponse, TaskOutputChunk,
-    TaskStatusRequest, TaskStatusResponse, WriteFileRequest, WriteFileResponse,
+    self, BatchCommandResponse, CommandRequest, DeleteFileRequest, DeleteFileResponse,
+    HealthRequest, HealthResponse, McpService, ReadFileRequest, ReadFileResponse,
+    TaskCreatedResponse, TaskOutputChunk, TaskStatusRequest, TaskStatusResponse,
+    WriteFileRequest, WriteFileResponse,
 };
 use crate::error::ErrorHandler;
 use crate::metrics;
@@ -12,13 +13,16 @@ use mcp_sandbox::CommandExecutor;
 use std::collections::HashMap;
 use std::sync::Arc;
 use std::time::{SystemTime, UNIX_EPOCH, Instant, Duration};
+use tokio::sync::{mpsc, watch};
 use tokio_stream::wrappers::ReceiverStream;
-use tonic::{Request, Response, Status};
+use tonic::{Request, Response, Status, Streaming};
 use tracing::{debug, info};
 use uuid::Uuid;
 
 /// MCPサービスの実装
-#[derive(Debug)]
+///
+/// 状態はすべてArcで共有しているため、cloneは安価でタスク状態も共有される
+#[derive(Debug, Clone)]
 pub struct McpServiceImpl {
     policy_engine: PolicyEngine,
     command_executor: CommandExecutor,
@@ -26,6 +30,8 @@ pub struct McpServiceImpl {
     // タスク状態格納用（本実装ではRedis/PostgreSQLなどに置き換える）
     tasks: Arc<dashmap::DashMap<String, proto::TaskInfo>>,
     results: Arc<dashmap::DashMap<String, proto::TaskResult>>,
+    // タスク状態の変更通知用（WatchTaskで購読する）
+    task_notifiers: Arc<dashmap::DashMap<String, watch::Sender<()>>>,
 }
 
 impl McpServiceImpl {
@@ -41,6 +47,7 @@ impl McpServiceImpl {
             start_time,
             tasks: Arc::new(dashmap::DashMap::new()),
             results: Arc::new(dashmap::DashMap::new()),
+            task_notifiers: Arc::new(dashmap::DashMap::new()),
         }
     }
 
@@ -62,6 +69,85 @@ impl McpServiceImpl {
     fn current_iso8601(&self) -> String {
         chrono::Utc::now().to_rfc3339()
     }
+
+    /// タスク状態の変更を購読する
+    ///
+    /// 状態が変わるたびに最新のスナップショットを`map`で変換して送信し、
+    /// タスクが終了状態になった時点でチャネルを閉じる。
+    /// gRPCのWatchTaskとRESTのSSEエンドポイントで共有する。
+    pub fn subscribe_task_updates<T, F>(
+        &self,
+        task_id: &str,
+        map: F,
+    ) -> McpResult<mpsc::Receiver<T>>
+    where
+        T: Send + 'static,
+        F: Fn(TaskStatusResponse) -> T + Send + 'static,
+    {
+        // 現在の状態を読む前に購読し、状態遷移の取りこぼしを防ぐ
+        // 終了済みのタスクは通知チャネルが破棄されているため、最終状態を一度だけ送信する
+        let mut updates = self.task_notifiers.get(task_id).map(|notifier| notifier.subscribe());
+        if updates.is_none() && !self.tasks.contains_key(task_id) {
+            return Err(McpError::NotFound(format!("タスクが見つかりません: {}", task_id)));
+        }
+
+        let (tx, rx) = mpsc::channel(16);
+        let tasks = self.tasks.clone();
+        let results = self.results.clone();
+        let task_id = task_id.to_string();
+
+        tokio::spawn(async move {
+            loop {
+                let task_info = match tasks.get(&task_id) {
+                    Some(info) => info.clone(),
+                    None => break,
+                };
+                let status = task_info.status;
+                let result = results.get(&task_id).map(|r| r.clone());
+
+                let response = TaskStatusResponse {
+                    task_info: Some(task_info),
+                    result,
+                };
+                if tx.send(map(response)).await.is_err() || is_terminal_status(status) {
+                    break;
+                }
+                let receiver = match updates.as_mut() {
+                    Some(receiver) => receiver,
+                    None => break,
+                };
+                if receiver.changed().await.is_err() {
+                    break;
+                }
+            }
+        });
+
+        Ok(rx)
+    }
+}
+
+/// タスク状態の変更を購読者に通知する
+fn notify_task_update(notifiers: &dashmap::DashMap<String, watch::Sender<()>>, task_id: &str) {
+    if let Some(notifier) = notifiers.get(task_id) {
+        notifier.send_replace(());
+    }
+}
+
+/// タスクの終了を購読者に通知し、通知チャネルを破棄する
+///
+/// 購読者は最終状態を受信した後にチャネルのクローズを検知して終了する
+fn finish_task_updates(notifiers: &dashmap::DashMap<String, watch::Sender<()>>, task_id: &str) {
+    if let Some((_, notifier)) = notifiers.remove(task_id) {
+        notifier.send_replace(());
+    }
+}
+
+/// タスクが終了状態かどうかを判定する
+fn is_terminal_status(status: i32) -> bool {
+    status == proto::TaskStatus::TaskCompleted as i32
+        || status == proto::TaskStatus::TaskFailed as i32
+        || status == proto::TaskStatus::TaskCancelled as i32
+        || status == proto::TaskStatus::TaskTimedOut as i32
 }
 
 #[tonic::async_trait]
@@ -178,6 +264,8 @@ impl McpService for McpServiceImpl {
             };
 
             self.tasks.insert(task_id.clone(), task_info.clone());
+            let (notifier, _) = watch::channel(());
+            self.task_notifiers.insert(task_id.clone(), notifier);
             
             // アクティブタスクをカウント
             metrics::increment_active_tasks();
@@ -186,6 +274,7 @@ impl McpService for McpServiceImpl {
             let executor = self.command_executor.clone();
             let tasks = self.tasks.clone();
             let results = self.results.clone();
+            let notifiers = self.task_notifiers.clone();
             let cmd = req.command.clone();
             let args = req.args.clone();
             let env = req.env.clone();
@@ -203,6 +292,7 @@ impl McpService for McpServiceImpl {
                     task.status = proto::TaskStatus::TaskRunning as i32;
                     task.started_at = Some(chrono::Utc::now().to_rfc3339());
                 }
+                notify_task_update(&notifiers, &task_id_clone);
 
                 // コマンドを実行
                 let result = executor
@@ -273,13 +363,14 @@ impl McpService for McpServiceImpl {
                                 execution_time_ms: 0,
                             };
 
-                            results.insert(task_id_clone, task_result);
+                            results.insert(task_id_clone.clone(), task_result);
                         }
                     }
                     
                     // アクティブタスクカウントを減少
                     metrics::decrement_active_tasks();
                 }
+                finish_task_updates(&notifiers, &task_id_clone);
             });
 
             // タスク作成応答を返す
@@ -301,6 +392,53 @@ impl McpService for McpServiceImpl {
         ErrorHandler::handle(result)
     }
 
+    /// コマンドの一括実行
+    type ExecuteBatchStream = ReceiverStream<Result<BatchCommandResponse, Status>>;
+
+    async fn execute_batch(
+        &self,
+        request: Request<Streaming<CommandRequest>>,
+    ) -> Result<Response<Self::ExecuteBatchStream>, Status> {
+        info!("コマンド一括実行リクエスト");
+
+        let mut commands = request.into_inner();
+        let (tx, rx) = mpsc::channel(128);
+        let service = self.clone();
+
+        // 受信したコマンドを順にExecuteCommandと同じ経路で受け付け、応答を同じ順序で返す
+        // コマンドごとのエラー（ポリシー違反など）は応答に含めて返し、ストリームは維持する
+        tokio::spawn(async move {
+            loop {
+                let command = match commands.message().await {
+                    Ok(Some(command)) => command,
+                    Ok(None) => break,
+                    Err(status) => {
+                        let _ = tx.send(Err(status)).await;
+                        break;
+                    }
+                };
+
+                let response = match service.execute_command(Request::new(command)).await {
+                    Ok(created) => BatchCommandResponse {
+                        task: Some(created.into_inner()),
+                        error: None,
+                        code: 0,
+                    },
+                    Err(status) => BatchCommandResponse {
+                        task: None,
+                        error: Some(status.message().to_string()),
+                        code: status.code() as i32,
+                    },
+                };
+                if tx.send(Ok(response)).await.is_err() {
+                    break;
+                }
+            }
+        });
+
+        Ok(Response::new(ReceiverStream::new(rx)))
+    }
+
     /// タスク状態取得
     async fn get_task_status(
         &self,
@@ -366,6 +504,23 @@ impl McpService for McpServiceImpl {
         ErrorHandler::handle(result)
     }
     
+    /// タスク状態の監視
+    type WatchTaskStream = ReceiverStream<Result<TaskStatusResponse, Status>>;
+
+    async fn watch_task(
+        &self,
+        request: Request<TaskStatusRequest>,
+    ) -> Result<Response<Self::WatchTaskStream>, Status> {
+        let req = request.into_inner();
+        debug!("タスク状態監視リクエスト: task_id={}", req.task_id);
+
+        let result: McpResult<Self::WatchTaskStream> = self
+            .subscribe_task_updates(&req.task_id, Ok)
+            .map(ReceiverStream::new);
+
+        ErrorHandler::handle(result)
+    }
+    
     /// タスクキャンセル
     async fn cancel_task(
         &self,
@@ -386,6 +541,8 @@ impl McpService for McpServiceImpl {
             task_info.completed_at = Some(self.current_iso8601());
             
             let task_info_clone = task_info.clone();
+            drop(task_info);
+            finish_task_updates(&self.task_notifiers, &req.task_id);
             
             // TODO: 実際のタスクをキャンセルする処理を実装
             
@@ -1,14 +1,18 @@
 #[cfg(test)]
 mod tests {
     use crate::proto::{
-        CommandRequest, HealthRequest, TaskStatusRequest,
+        CommandRequest, HealthRequest, McpServiceClient, McpServiceServer, TaskStatus,
+        TaskStatusRequest,
     };
     use crate::proto::mcp::mcp_service_server::McpService;
     use crate::service::McpServiceImpl;
     use mcp_policy::PolicyEngine;
     use mcp_sandbox::CommandExecutor;
     use std::collections::HashMap;
-    use std::time::SystemTime;
+    use std::time::{Duration, SystemTime};
+    use tokio_stream::StreamExt;
+    use tonic::transport::server::TcpIncoming;
+    use tonic::transport::Server;
     use tonic::Request;
     use uuid::Uuid;
     use tracing::info;
@@ -21,6 +25,19 @@ mod tests {
         McpServiceImpl::new(policy_engine, command_executor, start_time)
     }
 
+    // テスト用のヘルパー関数：コマンド実行リクエストを作成
+    fn command_request(command: &str, args: &[&str]) -> CommandRequest {
+        CommandRequest {
+            command: command.to_string(),
+            args: args.iter().map(|arg| arg.to_string()).collect(),
+            env: HashMap::new(),
+            cwd: None,
+            timeout: 10,
+            metadata: HashMap::new(),
+            sandbox_config: None,
+        }
+    }
+
     // ヘルスチェックのテスト
     #[tokio::test]
     async fn test_health() {
@@ -98,4 +115,130 @@ mod tests {
         let error = result.unwrap_err();
         assert_eq!(error.code(), tonic::Code::NotFound);
     }
-} 
\ No newline at end of file
+
+    // 存在しないタスクの状態監視テスト
+    #[tokio::test]
+    async fn test_watch_nonexistent_task() {
+        let service = create_service();
+        let nonexistent_task_id = format!("task-{}", Uuid::new_v4().simple());
+        
+        let request = Request::new(TaskStatusRequest {
+            task_id: nonexistent_task_id,
+        });
+        
+        let result = service.watch_task(request).await;
+        assert!(result.is_err());
+        
+        let error = result.unwrap_err();
+        assert_eq!(error.code(), tonic::Code::NotFound);
+    }
+
+    // 実行中タスクの状態監視テスト：終了状態まで状態遷移が配信されること
+    #[tokio::test]
+    async fn test_watch_task_until_completed() {
+        let service = create_service();
+
+        #[cfg(target_os = "windows")]
+        let (command, args): (&str, &[&str]) = ("cmd", &["/C", "echo", "hello"]);
+
+        #[cfg(not(target_os = "windows"))]
+        let (command, args): (&str, &[&str]) = ("echo", &["hello"]);
+
+        let created = service
+            .execute_command(Request::new(command_request(command, args)))
+            .await
+            .expect("コマンドの実行要求が失敗しました")
+            .into_inner();
+
+        let request = Request::new(TaskStatusRequest {
+            task_id: created.task_id.clone(),
+        });
+        let stream = service
+            .watch_task(request)
+            .await
+            .expect("タスク状態の監視に失敗しました")
+            .into_inner();
+
+        // 終了状態でストリームが閉じるまで受信する
+        let updates = tokio::time::timeout(Duration::from_secs(30), stream.collect::<Vec<_>>())
+            .await
+            .expect("タスクが時間内に終了しませんでした");
+        assert!(!updates.is_empty());
+
+        let last = updates.last().unwrap().as_ref().expect("状態更新がエラーになりました");
+        let task_info = last.task_info.as_ref().unwrap();
+        assert_eq!(task_info.task_id, created.task_id);
+        assert_eq!(task_info.status, TaskStatus::TaskCompleted as i32);
+
+        let result = last.result.as_ref().unwrap();
+        assert_eq!(result.exit_code, 0);
+        assert_eq!(result.stdout.trim(), "hello");
+
+        // 終了済みのタスクを監視した場合は最終状態のみが配信される
+        let request = Request::new(TaskStatusRequest {
+            task_id: created.task_id.clone(),
+        });
+        let stream = service
+            .watch_task(request)
+            .await
+            .expect("終了済みタスクの監視に失敗しました")
+            .into_inner();
+        let updates = stream.collect::<Vec<_>>().await;
+        assert_eq!(updates.len(), 1);
+
+        let task_info = updates[0].as_ref().unwrap().task_info.as_ref().unwrap();
+        assert_eq!(task_info.status, TaskStatus::TaskCompleted as i32);
+    }
+
+    // コマンド一括実行のテスト：拒否されたコマンドのエラーは応答に含まれ、後続のコマンドも処理されること
+    #[cfg(not(target_os = "windows"))]
+    #[tokio::test]
+    async fn test_execute_batch_reports_errors_in_band() {
+        // クライアントストリーミングを扱うため、実際のgRPCサーバーを起動して呼び出す
+        let listener = tokio::net::TcpListener::bind("127.0.0.1:0").await.unwrap();
+        let addr = listener.local_addr().unwrap();
+        tokio::spawn(
+            Server::builder()
+                .add_service(McpServiceServer::new(create_service()))
+                .serve_with_incoming(TcpIncoming::from_listener(listener, true, None).unwrap()),
+        );
+
+        let mut client = McpServiceClient::connect(format!("http://{}", addr))
+            .await
+            .expect("gRPCサーバーへの接続に失敗しました");
+
+        // 2番目のコマンドは許可リストにないためポリシーで拒否される
+        let commands = vec![
+            command_request("echo", &["first"]),
+            command_request("whoami", &[]),
+            command_request("echo", &["second"]),
+        ];
+        let stream = client
+            .execute_batch(tokio_stream::iter(commands))
+            .await
+            .expect("一括実行の開始に失敗しました")
+            .into_inner();
+
+        // リクエストストリームが閉じると応答ストリームも閉じる
+        let responses = tokio::time::timeout(Duration::from_secs(10), stream.collect::<Vec<_>>())
+            .await
+            .expect("一括実行の応答が時間内に終わりませんでした");
+        assert_eq!(responses.len(), 3);
+
+        let responses: Vec<_> = responses
+            .into_iter()
+            .map(|response| response.expect("ストリームがエラーで終了しました"))
+            .collect();
+
+        assert!(responses[0].task.is_some());
+        assert!(responses[0].error.is_none());
+        assert_eq!(responses[0].code, 0);
+
+        assert!(responses[1].task.is_none());
+        assert!(responses[1].error.is_some());
+        assert_eq!(responses[1].code, tonic::Code::PermissionDenied as i32);
+
+        assert!(responses[2].task.is_some());
+        assert!(responses[2].error.is_none());
+    }
+}
@@ -6,9 +6,13 @@ MCP Security Gateway - LSコマンド実行フローE2Eテスト
 gRPCサーバーを起動し、コマンド実行し、結果を検証します。
 
 前提条件:
-- mcp-gatewayがビルドされていること
-- grpcurlがインストールされていること
-- pexpectがインストールされていること
+- mcp-gatewayがリリースビルドされていること (`cargo build --release --bin mcp-gateway`)
+  別の場所のバイナリを使う場合は環境変数MCP_GATEWAY_BINでパスを指定する
+- grpcioがインストールされていること (`pip install grpcio grpcio-tools`)
+- requestsとprometheus_clientがインストールされていること (`pip install requests prometheus_client`)
+- gRPCのPythonスタブが生成されていること:
+    python -m grpc_tools.protoc -I proto --python_out=tests/e2e \
+        --grpc_python_out=tests/e2e proto/mcp.proto
 - Pythonがインストールされていること (3.7以上)
 
 使用方法:
@@ -16,52 +20,178 @@ gRPCサーバーを起動し、コマンド実行し、結果を検証します
 """
 
 import os
-import sys
 import time
-import json
+import socket
 import tempfile
 import subprocess
+import threading
 import unittest
-import pexpect
 import signal
-import uuid
 from pathlib import Path
 
+import grpc
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+import mcp_pb2
+import mcp_pb2_grpc
+
+
+# リポジトリのルートディレクトリ
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# ゲートウェイが待ち受けを開始するまでの最大待機時間 (秒)
+STARTUP_TIMEOUT = 30
+
+# 1回のRPCの最大待機時間 (秒)
+# ゲートウェイが応答しなくなった場合にテストが止まり続けないようにする
+RPC_TIMEOUT = 5
+
+
+def _find_free_port():
+    """OSに空きポートを割り当ててもらう"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _drain_output(stream, listening):
+    """サーバーの出力を読み続け、'Server listening'を検出したらイベントをセットする
+
+    パイプが詰まってサーバーがブロックしないよう、起動後も残りの出力を読み捨てる。
+    """
+    for line in iter(stream.readline, b''):
+        if b'Server listening' in line:
+            listening.set()
+
+
+def _signal_process_group(pgid, sig):
+    """プロセスグループにシグナルを送る (グループ内のプロセスがすべて終了済みなら何もしない)"""
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        pass
+
 
 class LSFlowTest(unittest.TestCase):
     """MCPセキュリティゲートウェイのlsコマンド実行フローのE2Eテスト"""
 
+    @classmethod
+    def setUpClass(cls):
+        """ゲートウェイをテストクラスごとに1回だけ起動する"""
+        # テストモジュールを並列実行できるよう、クラスごとに空きポートを使う
+        cls.grpc_address = f'127.0.0.1:{_find_free_port()}'
+        cls.metrics_address = f'127.0.0.1:{_find_free_port()}'
+        cls.metrics_url = f'http://{cls.metrics_address}/metrics'
+
+        # サービスの起動 (ビルド済みバイナリを直接実行する)
+        gateway_bin = os.environ.get(
+            'MCP_GATEWAY_BIN',
+            str(REPO_ROOT / 'target' / 'release' / 'mcp-gateway')
+        )
+        cls.server_process = subprocess.Popen(
+            [gateway_bin],
+            env=dict(
+                os.environ,
+                MCP_BIND_ADDRESS=cls.grpc_address,
+                MCP_METRICS_BIND_ADDRESS=cls.metrics_address
+            ),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            # 子プロセスごとまとめて終了できるよう、独立したプロセスグループで起動する
+            start_new_session=True
+        )
+        try:
+            listening = threading.Event()
+            threading.Thread(
+                target=_drain_output,
+                args=(cls.server_process.stdout, listening),
+                daemon=True
+            ).start()
+
+            # 'Server listening'が出力されるまで待機
+            # ログレベルの設定やバインドの失敗で出力されない場合に備えて期限を設ける
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while not listening.wait(timeout=0.1):
+                if cls.server_process.poll() is not None:
+                    raise RuntimeError('mcp-gateway exited before it started listening')
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(
+                        f'mcp-gateway did not start listening within {STARTUP_TIMEOUT}s'
+                    )
+
+            # テスト全体で1本のチャネルを使い回す
+            cls.channel = grpc.insecure_channel(cls.grpc_address)
+            cls.stub = mcp_pb2_grpc.McpServiceStub(cls.channel)
+            # メトリクス取得用のkeep-aliveセッション
+            cls.http = requests.Session()
+
+            # Health RPCが成功すればリクエストを受け付けられる状態とみなす
+            cls._wait_until_healthy()
+        except Exception:
+            cls._stop_server()
+            raise
+
+    @classmethod
+    def _wait_until_healthy(cls, timeout=10):
+        """Health RPCが成功するまで指数バックオフで待機する"""
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            try:
+                cls.stub.Health(mcp_pb2.HealthRequest(), timeout=0.2)
+                return
+            except grpc.RpcError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+
+    @classmethod
+    def tearDownClass(cls):
+        """ゲートウェイを停止する"""
+        cls._stop_server()
+
+    @classmethod
+    def _stop_server(cls):
+        """サーバープロセスの終了"""
+        if hasattr(cls, 'channel'):
+            cls.channel.close()
+        if hasattr(cls, 'http'):
+            cls.http.close()
+
+        # プロセスグループにSIGTERM送信し、終了しなければSIGKILLで強制終了する
+        # start_new_sessionで起動しているため、プロセスグループIDはpidと同じになる
+        # グループリーダーが先に終了していても子プロセスが残りうるため、常にグループへ送信する
+        pgid = cls.server_process.pid
+        _signal_process_group(pgid, signal.SIGTERM)
+        try:
+            cls.server_process.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            _signal_process_group(pgid, signal.SIGKILL)
+            cls.server_process.wait()
+
     def setUp(self):
         """テスト環境のセットアップ"""
         # 一時ディレクトリを作成
         self.temp_dir = tempfile.TemporaryDirectory()
         self.workspace_path = self.temp_dir.name
 
-        # テスト用ファイルを作成
+        # テスト用ファイルを作成 (ファイルごとにopen/write/closeの1回ずつで済ませる)
         test_files = ['file1.txt', 'file2.txt', 'file3.txt']
         for file_name in test_files:
-            with open(os.path.join(self.workspace_path, file_name), 'w') as f:
-                f.write(f'Content of {file_name}')
-
-        # サービスの起動
-        self.server_process = pexpect.spawn(
-            'cargo run --bin mcp-gateway -- serve --host 127.0.0.1 --port 50051',
-            timeout=10
-        )
-        # 'Server listening'が出力されるまで待機
-        self.server_process.expect('Server listening', timeout=15)
-        
-        # サーバーが起動するまで少し待機
-        time.sleep(2)
+            fd = os.open(
+                os.path.join(self.workspace_path, file_name),
+                os.O_WRONLY | os.O_CREAT,
+                0o644
+            )
+            try:
+                os.write(fd, b'Content of ' + file_name.encode())
+            finally:
+                os.close(fd)
 
     def tearDown(self):
         """テスト環境のクリーンアップ"""
-        # サーバープロセスの終了
-        if hasattr(self, 'server_process') and self.server_process.isalive():
-            # SIGTERM送信
-            self.server_process.kill(signal.SIGTERM)
-            self.server_process.wait()
-
         # 一時ディレクトリの削除
         if hasattr(self, 'temp_dir'):
             self.temp_dir.cleanup()
@@ -69,77 +199,69 @@ class LSFlowTest(unittest.TestCase):
     def test_ls_command_execution(self):
         """lsコマンドの実行フロー全体をテスト"""
         # 1. ヘルスチェック
-        health_result = self._run_grpcurl("mcp.McpService/Health", "{}")
-        self.assertEqual(health_result.get('status'), 'healthy')
+        health_result = self.stub.Health(mcp_pb2.HealthRequest(), timeout=RPC_TIMEOUT)
+        self.assertEqual(health_result.status, 'ok')
         
         # 2. lsコマンドを実行
-        command_request = {
-            "command": "ls",
-            "args": ["-la", self.workspace_path],
-            "timeout": 30
-        }
-        
-        ls_result = self._run_grpcurl(
-            "mcp.McpService/ExecuteCommand", 
-            json.dumps(command_request)
+        command_request = mcp_pb2.CommandRequest(
+            command="ls",
+            args=["-la", self.workspace_path],
+            timeout=30
         )
         
+        ls_result = self.stub.ExecuteCommand(command_request, timeout=RPC_TIMEOUT)
+        
         # タスクIDを取得
-        task_id = ls_result.get('task_id')
-        self.assertIsNotNone(task_id)
+        task_id = ls_result.task_id
+        self.assertTrue(task_id)
         
-        # 3. タスクステータスをチェック (最大10秒待機)
+        # 3. タスクステータスをチェック (最大10秒待機、10msからの指数バックオフ)
+        status_request = mcp_pb2.TaskStatusRequest(task_id=task_id)
         status_result = None
-        for _ in range(10):
-            status_result = self._run_grpcurl(
-                "mcp.McpService/GetTaskStatus",
-                json.dumps({"task_id": task_id})
-            )
+        deadline = time.monotonic() + 10
+        delay = 0.01
+        while time.monotonic() < deadline:
+            status_result = self.stub.GetTaskStatus(status_request, timeout=RPC_TIMEOUT)
             
-            if status_result.get('task_info', {}).get('status') in ['TASK_COMPLETED', 'TASK_FAILED']:
+            if status_result.task_info.status in (mcp_pb2.TASK_COMPLETED, mcp_pb2.TASK_FAILED):
                 break
                 
-            time.sleep(1)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
         
         # 4. 結果の検証
         self.assertIsNotNone(status_result)
-        self.assertEqual(status_result.get('task_info', {}).get('status'), 'TASK_COMPLETED')
+        self.assertEqual(status_result.task_info.status, mcp_pb2.TASK_COMPLETED)
         
         # 結果に3つのテストファイルが含まれていることを確認
-        stdout = status_result.get('result', {}).get('stdout', '')
+        stdout = status_result.result.stdout
         for file_name in ['file1.txt', 'file2.txt', 'file3.txt']:
             self.assertIn(file_name, stdout)
         
         # 5. メトリクスの検証
-        metrics_output = subprocess.check_output(
-            ['curl', '-s', 'http://localhost:9090/metrics'],
-            universal_newlines=True
-        )
+        metrics = self._get_metrics()
         
         # タスク実行時間メトリクスが存在することを確認
-        self.assertIn('mcp_task_latency_ms', metrics_output)
+        self.assertIn('mcp_task_latency_ms', metrics)
         
         # API呼び出し数メトリクスが存在することを確認
-        self.assertIn('mcp_api_requests_total', metrics_output)
-
-    def _run_grpcurl(self, method, request_json):
-        """gRPCurlを使用してgRPCメソッドを呼び出す"""
-        cmd = [
-            'grpcurl',
-            '-plaintext',
-            '-d', request_json,
-            '127.0.0.1:50051',
-            method
-        ]
-        
-        try:
-            result = subprocess.check_output(cmd, universal_newlines=True)
-            return json.loads(result)
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing grpcurl: {e}")
-            print(f"Stdout: {e.stdout if hasattr(e, 'stdout') else 'N/A'}")
-            print(f"Stderr: {e.stderr if hasattr(e, 'stderr') else 'N/A'}")
-            raise
+        self.assertIn('mcp_api_requests_total', metrics)
+
+    def _get_metrics(self):
+        """メトリクスを取得し、名前をキーにした辞書として返す
+
+        カウンターのメトリクスファミリー名からは接尾辞"_total"が除かれるため、
+        サンプル名もキーとして登録する。
+        """
+        response = self.http.get(self.metrics_url, timeout=5)
+        response.raise_for_status()
+
+        metrics = {}
+        for family in text_string_to_metric_families(response.text):
+            metrics[family.name] = family
+            for sample in family.samples:
+                metrics.setdefault(sample.name, family)
+        return metrics
 
 
 if __name__ == '__main__':
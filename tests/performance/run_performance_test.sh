@@ -6,13 +6,22 @@
 #
 # 前提条件:
 # - locustがインストールされていること (`pip install locust`)
+# - orjsonがインストールされていること (`pip install orjson`)
+# - grpcio-toolsがインストールされていること (`pip install grpcio grpcio-tools`)
 # - MCP Security Gatewayが実行中であること
+#   (MCPUserの場合はREST APIを有効にするため、MCP_HTTP_BIND_ADDRESSを設定して起動すること)
 #
 # 使用方法:
 #     ./run_performance_test.sh [host] [users] [spawn_rate] [duration]
 #
+# 環境変数:
+#     USER_CLASS:  使用するLocustユーザークラス (デフォルト: MCPGrpcUser)
+#     MCP_HTTP_BIND_ADDRESS:
+#                  REST APIサーバーのバインドアドレス (デフォルト: 127.0.0.1:8080)
+#                  ゲートウェイの起動時と同じ値を指定する。MCPUserの場合のみ使用する
+#
 # パラメータ:
-#     host:        ターゲットホスト (デフォルト: http://localhost:8081)
+#     host:        ターゲットホスト (デフォルト: http://localhost:8081、MCPUserの場合はhttp://${MCP_HTTP_BIND_ADDRESS})
 #     users:       同時ユーザー数 (デフォルト: 20)
 #     spawn_rate:  毎秒あたりの新規ユーザー数 (デフォルト: 5)
 #     duration:    テスト継続時間（秒） (デフォルト: 300 = 5分)
@@ -20,7 +29,16 @@
 set -e
 
 # パラメータ設定
-HOST=${1:-"http://localhost:8081"}
+USER_CLASS=${USER_CLASS:-"MCPGrpcUser"}
+# RESTのユーザークラスはgRPCではなくREST APIサーバーに接続する
+# REST APIサーバーはMCP_HTTP_BIND_ADDRESSが設定された場合にのみ起動するため、同じ値を使う
+REST_ADDRESS=${MCP_HTTP_BIND_ADDRESS:-"127.0.0.1:8080"}
+if [ "${USER_CLASS}" = "MCPUser" ]; then
+    DEFAULT_HOST="http://${REST_ADDRESS}"
+else
+    DEFAULT_HOST="http://localhost:8081"
+fi
+HOST=${1:-${DEFAULT_HOST}}
 USERS=${2:-20}
 SPAWN_RATE=${3:-5}
 DURATION=${4:-300}
@@ -37,6 +55,7 @@ echo "Target Host:     ${HOST}"
 echo "Users:           ${USERS}"
 echo "Spawn Rate:      ${SPAWN_RATE}/sec"
 echo "Duration:        ${DURATION} seconds"
+echo "User Class:      ${USER_CLASS}"
 echo "Report Location: ${REPORT_DIR}"
 echo "======================================================"
 
@@ -46,13 +65,19 @@ if ! command -v locust &> /dev/null; then
     exit 1
 fi
 
-# ホストが到達可能かチェック
-if ! curl -s --head --fail "${HOST}/health" &> /dev/null; then
+# ホストが到達可能かチェック (RESTエンドポイントを使う場合のみ)
+if [ "${USER_CLASS}" = "MCPUser" ] && ! curl -s --head --fail "${HOST}/health" &> /dev/null; then
     echo "Error: Host ${HOST} is not reachable or health check failed."
-    echo "Make sure MCP Security Gateway is running and accessible."
+    echo "Make sure MCP Security Gateway is running with MCP_HTTP_BIND_ADDRESS=${REST_ADDRESS}."
     exit 1
 fi
 
+# gRPCのPythonスタブを生成
+python -m grpc_tools.protoc -I proto \
+  --python_out=tests/performance \
+  --grpc_python_out=tests/performance \
+  proto/mcp.proto
+
 echo "[$(date +"%H:%M:%S")] Starting performance test..."
 
 # Locustをヘッドレスモードで実行
@@ -63,7 +88,8 @@ locust -f tests/performance/locustfile.py \
   --run-time="${DURATION}s" \
   --headless \
   --csv="${REPORT_DIR}/stats" \
-  --html="${REPORT_DIR}/report.html"
+  --html="${REPORT_DIR}/report.html" \
+  "${USER_CLASS}"
 
 echo "[$(date +"%H:%M:%S")] Performance test completed."
 echo "Results saved to: ${REPORT_DIR}"